@@ -1,11 +1,25 @@
+import hashlib
 import json
+import sqlite3
+import threading
+import time
 
 import anthropic
+from anthropic.types.message_create_params import MessageCreateParamsNonStreaming
+from anthropic.types.messages.batch_create_params import Request
+
+try:
+    import orjson
+except ImportError:  # valfritt — stdlib json används som fallback
+    orjson = None
 
 import config
 
 client = anthropic.Anthropic()
 
+_cache_db: sqlite3.Connection | None = None
+_cache_lock = threading.Lock()
+
 SYSTEM_PROMPT = """Du är expert på att analysera svenska upphandlingsdokument och ramavtal.
 
 Din uppgift: Givet en kategori och ett antal textpassager, bedöm hur relevant varje passage är för kategorin.
@@ -23,16 +37,38 @@ Svara ALLTID med giltig JSON — en lista med objekt:
 - Om den direkt handlar om kategorin, ge 7-10"""
 
 
-def classify_chunks(chunks: list[dict], category: str) -> list[dict]:
-    if not chunks:
-        return []
+# Characters of each passage sent to Claude, unless the candidates would
+# exceed CATEGORY_PROMPT_TOKEN_BUDGET
+PASSAGE_CHARS = 1500
+
+
+def _candidate_count(index) -> int:
+    # Scale retrieval depth with corpus size, within [MIN, MAX] candidates
+    k = int(config.CATEGORY_CANDIDATE_FRACTION * len(index.chunks))
+    return max(config.CATEGORY_MIN_CANDIDATES, min(config.CATEGORY_MAX_CANDIDATES, k))
+
 
+def _passage_chars(chunks: list[dict]) -> int:
+    # ~4 characters per token for Swedish prose
+    est_tokens = sum(min(len(c["text"]), PASSAGE_CHARS) for c in chunks) // 4
+    if est_tokens > config.CATEGORY_PROMPT_TOKEN_BUDGET:
+        # Share the budget evenly so the prompt stays within it
+        return config.CATEGORY_PROMPT_TOKEN_BUDGET * 4 // len(chunks)
+    return PASSAGE_CHARS
+
+
+def _max_tokens(n_passages: int) -> int:
+    # Reply is one JSON object per passage; size the budget so it isn't cut off
+    return 256 + config.CATEGORY_OUTPUT_TOKENS_PER_PASSAGE * n_passages
+
+
+def _build_prompt(chunks: list[dict], category: str, max_chars: int) -> str:
     passages = "\n\n".join(
-        f"[{i}] (Källa: {c['filename']})\n{c['text'][:1500]}"
+        f"[{i}] (Källa: {c['filename']})\n{c['text'][:max_chars]}"
         for i, c in enumerate(chunks)
     )
 
-    prompt = f"""Kategori: "{category}"
+    return f"""Kategori: "{category}"
 
 Bedöm relevansen (0-10) för varje passage nedan:
 
@@ -40,23 +76,20 @@ Bedöm relevansen (0-10) för varje passage nedan:
 
 Svara med JSON-lista. Inkludera alla {len(chunks)} passager."""
 
-    response = client.messages.create(
-        model=config.CLAUDE_MODEL,
-        max_tokens=2048,
-        system=SYSTEM_PROMPT,
-        messages=[{"role": "user", "content": prompt}],
-    )
-
-    response_text = response.content[0].text
 
+def _parse_scores(response_text: str) -> list[dict]:
     # Parse JSON from response (handle markdown code blocks)
     text = response_text.strip()
     if text.startswith("```"):
         text = text.split("\n", 1)[1]
         text = text.rsplit("```", 1)[0]
 
-    scores = json.loads(text)
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
 
+def _merge_scores(chunks: list[dict], scores: list[dict]) -> list[dict]:
     # Merge scores back into chunk dicts
     score_map = {item["index"]: item for item in scores}
     results = []
@@ -72,9 +105,222 @@ Svara med JSON-lista. Inkludera alla {len(chunks)} passager."""
     return results
 
 
+# ---------------------------------------------------------------------------
+# Score cache – (kategori, chunk-innehåll) -> {score, motivering}
+# ---------------------------------------------------------------------------
+
+def _get_cache() -> sqlite3.Connection:
+    # Callers hold _cache_lock; the connection is shared across worker threads
+    global _cache_db
+    if _cache_db is None:
+        config.INDEX_DIR.mkdir(exist_ok=True)
+        _cache_db = sqlite3.connect(config.INDEX_DIR / "classifier_cache.sqlite",
+                                    check_same_thread=False)
+        _cache_db.execute(
+            "CREATE TABLE IF NOT EXISTS cache "
+            "(key TEXT PRIMARY KEY, score INTEGER, motiv TEXT, ts INTEGER)"
+        )
+        # Evict stale entries once per process
+        max_age = config.CLASSIFIER_CACHE_TTL_DAYS * 86400
+        _cache_db.execute("DELETE FROM cache WHERE ts < ?",
+                          (int(time.time()) - max_age,))
+        _cache_db.commit()
+    return _cache_db
+
+
+def _cache_key(category: str, chunk: dict, max_chars: int) -> str:
+    # Keyed on the exact passage text Claude sees
+    raw = f"{category.lower().strip()}|{chunk['text'][:max_chars]}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _cache_get(keys: list[str]) -> dict[str, dict]:
+    if not keys:
+        return {}
+    placeholders = ",".join("?" * len(keys))
+    # Eviction only runs at connection open; skip entries that expired since
+    min_ts = int(time.time()) - config.CLASSIFIER_CACHE_TTL_DAYS * 86400
+    with _cache_lock:
+        rows = _get_cache().execute(
+            f"SELECT key, score, motiv FROM cache "
+            f"WHERE key IN ({placeholders}) AND ts >= ?",
+            [*keys, min_ts],
+        ).fetchall()
+    return {key: {"relevance": score, "motivering": motiv}
+            for key, score, motiv in rows}
+
+
+def _cache_put(category: str, classified: list[dict],
+               max_chars: int) -> dict[str, dict]:
+    entries = {
+        _cache_key(category, c, max_chars): {"relevance": c["relevance"],
+                                  "motivering": c["motivering"]}
+        for c in classified
+    }
+    now = int(time.time())
+    with _cache_lock:
+        db = _get_cache()
+        db.executemany(
+            "INSERT OR REPLACE INTO cache (key, score, motiv, ts) VALUES (?, ?, ?, ?)",
+            [(k, e["relevance"], e["motivering"], now) for k, e in entries.items()],
+        )
+        db.commit()
+    return entries
+
+
+def _unique_misses(chunks: list[dict], keys: list[str],
+                   scored: dict[str, dict]) -> list[dict]:
+    # Identical passages share a key: send each one to Claude once,
+    # _apply_scores fans the score back out to every duplicate
+    misses: dict[str, dict] = {}
+    for c, k in zip(chunks, keys):
+        if k not in scored and k not in misses:
+            misses[k] = c
+    return list(misses.values())
+
+
+def _apply_scores(chunks: list[dict], keys: list[str],
+                  scored: dict[str, dict]) -> list[dict]:
+    return [{**c, **scored[k]} for c, k in zip(chunks, keys) if k in scored]
+
+
+# ---------------------------------------------------------------------------
+# Classification
+# ---------------------------------------------------------------------------
+
+def classify_chunks(chunks: list[dict], category: str) -> list[dict]:
+    """Klassificera en kandidatgrupp med ett synkront anrop (GUI/CLI)."""
+    if not chunks:
+        return []
+
+    max_chars = _passage_chars(chunks)
+    keys = [_cache_key(category, c, max_chars) for c in chunks]
+    scored = _cache_get(keys)
+    misses = _unique_misses(chunks, keys, scored)
+
+    if misses:
+        response = client.messages.create(
+            model=config.CLAUDE_MODEL,
+            max_tokens=_max_tokens(len(misses)),
+            system=SYSTEM_PROMPT,
+            messages=[{"role": "user",
+                       "content": _build_prompt(misses, category, max_chars)}],
+        )
+        if response.stop_reason == "max_tokens":
+            raise RuntimeError(
+                f"Claudes svar för \"{category}\" kapades vid max_tokens "
+                f"({len(misses)} passager) — höj CATEGORY_OUTPUT_TOKENS_PER_PASSAGE"
+            )
+        classified = _merge_scores(misses, _parse_scores(response.content[0].text))
+        scored.update(_cache_put(category, classified, max_chars))
+
+    return _apply_scores(chunks, keys, scored)
+
+
+def classify_chunks_batch(
+    jobs: list[tuple[str, list[dict]]],
+) -> tuple[list[list[dict]], dict[str, str]]:
+    """Klassificera flera (kategori, kandidater)-par i ett Messages Batch-jobb.
+
+    Returnerar ``(klassificerade, misslyckade)``: klassificerade chunks per
+    jobb i samma ordning som ``jobs``, samt ``{kategori: orsak}`` för jobb
+    som misslyckades (deras lista innehåller bara cachade bedömningar).
+    Batch-API:t debiteras till halva priset men har längre och
+    oförutsägbar latens — använd ``classify_chunks`` för interaktiva
+    engångsanrop.
+    """
+    job_chars = [_passage_chars(chunks) for _, chunks in jobs]
+    job_keys = [
+        [_cache_key(category, c, max_chars) for c in chunks]
+        for (category, chunks), max_chars in zip(jobs, job_chars)
+    ]
+    job_scored = [_cache_get(keys) for keys in job_keys]
+    job_misses = [
+        _unique_misses(chunks, keys, scored)
+        for (_, chunks), keys, scored in zip(jobs, job_keys, job_scored)
+    ]
+    failed: dict[str, str] = {}
+
+    requests = [
+        Request(
+            custom_id=f"job-{i}",
+            params=MessageCreateParamsNonStreaming(
+                model=config.CLAUDE_MODEL,
+                max_tokens=_max_tokens(len(misses)),
+                system=SYSTEM_PROMPT,
+                messages=[{"role": "user",
+                           "content": _build_prompt(misses, category, job_chars[i])}],
+            ),
+        )
+        for i, ((category, _), misses) in enumerate(zip(jobs, job_misses))
+        if misses
+    ]
+
+    if requests:
+        batch = _wait_for_batch(client.messages.batches.create(requests=requests))
+
+        pending = {int(r["custom_id"].removeprefix("job-")) for r in requests}
+        for entry in client.messages.batches.results(batch.id):
+            i = int(entry.custom_id.removeprefix("job-"))
+            pending.discard(i)
+            category = jobs[i][0]
+            if entry.result.type != "succeeded":
+                failed[category] = entry.result.type
+                continue
+            message = entry.result.message
+            if message.stop_reason == "max_tokens":
+                failed[category] = ("svaret kapades vid max_tokens — "
+                                    "höj CATEGORY_OUTPUT_TOKENS_PER_PASSAGE")
+                continue
+            # One malformed reply must not discard the jobs already paid for
+            try:
+                classified = _merge_scores(job_misses[i],
+                                           _parse_scores(message.content[0].text))
+            except (ValueError, KeyError, TypeError) as e:
+                failed[category] = f"ogiltigt svar: {e}"
+                continue
+            job_scored[i].update(_cache_put(category, classified, job_chars[i]))
+
+        for i in pending:
+            failed[jobs[i][0]] = "saknas i batch-resultatet"
+
+    classified = [
+        _apply_scores(chunks, keys, scored)
+        for (_, chunks), keys, scored in zip(jobs, job_keys, job_scored)
+    ]
+    return classified, failed
+
+
+def _wait_for_batch(batch):
+    # Poll until the batch ends; cancel it on timeout or Ctrl-C so it
+    # isn't left running (and billed) in the background
+    deadline = time.monotonic() + config.BATCH_TIMEOUT_SECONDS
+    try:
+        while batch.processing_status != "ended":
+            if time.monotonic() > deadline:
+                raise TimeoutError(
+                    f"Batch {batch.id} blev inte klar inom "
+                    f"{config.BATCH_TIMEOUT_SECONDS} sekunder"
+                )
+            time.sleep(config.BATCH_POLL_SECONDS)
+            batch = client.messages.batches.retrieve(batch.id)
+    except (KeyboardInterrupt, TimeoutError):
+        client.messages.batches.cancel(batch.id)
+        print(f"Batch {batch.id} avbruten.")
+        raise
+    return batch
+
+
+def _filter_relevant(classified: list[dict]) -> list[dict]:
+    # Filter (score >= 5) and sort
+    relevant = [c for c in classified if c.get("relevance", 0) >= 5]
+    relevant.sort(key=lambda x: -x["relevance"])
+    return relevant
+
+
 def search_by_category(category: str, index) -> list[dict]:
-    # Step 1: Hybrid retrieval — top 20 candidates
-    candidates = index.search(category, top_k=20)
+    # Step 1: Hybrid retrieval — top candidates, scaled to corpus size
+    candidates = index.search(category, top_k=_candidate_count(index))
 
     if not candidates:
         print("Inga resultat hittades.")
@@ -85,8 +331,31 @@ def search_by_category(category: str, index) -> list[dict]:
     # Step 2: LLM classification
     classified = classify_chunks(candidates, category)
 
-    # Step 3: Filter (score >= 5) and sort
-    relevant = [c for c in classified if c.get("relevance", 0) >= 5]
-    relevant.sort(key=lambda x: -x["relevance"])
+    # Step 3: Filter and sort
+    return _filter_relevant(classified)
 
-    return relevant
+
+def search_by_categories(
+    categories: list[str], index,
+) -> tuple[dict[str, list[dict]], dict[str, str]]:
+    """Kategori-sökning för flera kategorier via ett gemensamt batch-jobb.
+
+    Returnerar ``(resultat per kategori, {kategori: orsak} för misslyckade)``.
+    """
+    # Step 1: Hybrid retrieval per category
+    top_k = _candidate_count(index)
+    jobs = [(category, index.search(category, top_k=top_k)) for category in categories]
+
+    n_candidates = sum(len(chunks) for _, chunks in jobs)
+    print(f"Hittade {n_candidates} kandidater för {len(jobs)} kategorier, "
+          f"klassificerar med Claude (batch)...")
+
+    # Step 2: LLM classification — one batch request per category
+    classified, failed = classify_chunks_batch(jobs)
+
+    # Step 3: Filter and sort per category
+    results = {
+        category: _filter_relevant(chunks)
+        for (category, _), chunks in zip(jobs, classified)
+    }
+    return results, failed
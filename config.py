@@ -4,7 +4,29 @@ DOCS_DIR = Path("Docs")
 INDEX_DIR = Path(".index")
 
 EMBEDDING_MODEL = "KBLab/sentence-bert-swedish-cased"
+EMBEDDING_BATCH_SIZE = 64  # texter per forward pass vid indexering
+EMBEDDING_DEVICE = None    # None = automatiskt (cuda/mps om tillgängligt), annars "cpu", "cuda", ...
+EMBEDDING_BACKEND = "torch"  # "torch" eller "onnx" (kräver optimum[onnxruntime]); byte kräver ny indexering
+EMBEDDING_ONNX_QUANTIZE = True  # int8-kvantisera ONNX-modellen (CPU); exporten cachas per modell i INDEX_DIR
+FP16_EMBEDDINGS = False    # float16 = halva diskstorleken men ~10x långsammare exakt sökning
+QUERY_CACHE_SIZE = 512     # antal cachade fråge-embeddings (LRU)
+
+# Approximativ vektorsökning (kräver faiss-cpu); under gränsen används exakt sökning
+ANN_MIN_CHUNKS = 20000
+ANN_HNSW_M = 32            # grannar per nod i HNSW-grafen
+ANN_EF_SEARCH = 128        # sökbredd — högre = bättre recall, långsammare
+
 CLAUDE_MODEL = "claude-sonnet-4-5-20250929"
+BATCH_POLL_SECONDS = 10  # sekunder mellan statuskontroller av Messages Batch
+BATCH_TIMEOUT_SECONDS = 3600  # avbryt batchen om den inte är klar inom denna tid
+CLASSIFIER_CACHE_TTL_DAYS = 30  # livslängd för cachade Claude-bedömningar
+
+# Kategori-sökning: antal kandidater = andel av alla chunks, inom [MIN, MAX]
+CATEGORY_MIN_CANDIDATES = 20
+CATEGORY_MAX_CANDIDATES = 50
+CATEGORY_CANDIDATE_FRACTION = 0.005
+CATEGORY_PROMPT_TOKEN_BUDGET = 8000  # 20 kandidater à 1500 tecken ryms; fler kortas per passage
+CATEGORY_OUTPUT_TOKENS_PER_PASSAGE = 80  # svarsbudget per bedömd passage (~40 tokens per JSON-objekt)
 
 CHUNK_SIZE = 400       # ord per chunk
 CHUNK_OVERLAP = 50     # ord overlap
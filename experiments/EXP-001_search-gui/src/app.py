@@ -1,6 +1,9 @@
 """EXP-001: Sök-GUI för Ramavtal — FastAPI backend."""
 
+import asyncio
 import sys
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from pathlib import Path
 
 # Lägg till projektets rot i path så vi kan importera rag_engine/category_classifier
@@ -14,18 +17,24 @@ from pydantic import BaseModel
 
 from rag_engine import HybridIndex
 
-app = FastAPI(title="Ramavtal Sök-GUI")
-templates = Jinja2Templates(directory=str(Path(__file__).parent / "templates"))
 
-# Ladda index vid uppstart
-_index: HybridIndex | None = None
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Ladda index vid uppstart, i en tråd så att event-loopen inte blockeras.
+    # Embeddings är minnesmappade; med float32-lagring (standard) delar flera
+    # workers samma sidor. Med FP16_EMBEDDINGS konverteras de per sökning.
+    app.state.index = await asyncio.to_thread(HybridIndex.load)
+    yield
+
+
+app = FastAPI(title="Ramavtal Sök-GUI", lifespan=lifespan)
+templates = Jinja2Templates(directory=str(Path(__file__).parent / "templates"))
+# Mallen ändras inte under körning — hoppa över mtime-kontrollen per anrop
+templates.env.auto_reload = False
 
 
-def get_index() -> HybridIndex:
-    global _index
-    if _index is None:
-        _index = HybridIndex.load()
-    return _index
+def get_index(request: Request) -> HybridIndex:
+    return request.app.state.index
 
 
 class SearchRequest(BaseModel):
@@ -39,34 +48,40 @@ class CategoryRequest(BaseModel):
 
 @app.get("/", response_class=HTMLResponse)
 async def index_page(request: Request):
-    idx = get_index()
+    idx = get_index(request)
     has_index = bool(idx.chunks)
     doc_count = len(idx.manifest) if has_index else 0
     chunk_count = len(idx.chunks) if has_index else 0
-    return templates.TemplateResponse("index.html", {
-        "request": request,
-        "has_index": has_index,
-        "doc_count": doc_count,
-        "chunk_count": chunk_count,
-    })
+    return HTMLResponse(_homepage_html(has_index, doc_count, chunk_count))
+
+
+@lru_cache(maxsize=8)
+def _homepage_html(has_index: bool, doc_count: int, chunk_count: int) -> str:
+    # Sidan beror bara på indexstatistiken — rendera en gång per kombination
+    return templates.get_template("index.html").render(
+        has_index=has_index,
+        doc_count=doc_count,
+        chunk_count=chunk_count,
+    )
 
 
 @app.post("/api/search")
-async def api_search(req: SearchRequest):
-    idx = get_index()
+async def api_search(req: SearchRequest, request: Request):
+    idx = get_index(request)
     if not idx.chunks:
         return {"error": "Inget index finns. Kör 'python search.py index' först.", "results": []}
 
     if not req.query.strip():
         return {"error": "Ange en sökfråga.", "results": []}
 
-    results = idx.search(req.query, top_k=req.top_k)
+    # CPU-bundet (embedding + rankning) — kör utanför event-loopen
+    results = await asyncio.to_thread(idx.search, req.query, top_k=req.top_k)
     return {"results": results}
 
 
 @app.post("/api/kategori")
-async def api_kategori(req: CategoryRequest):
-    idx = get_index()
+async def api_kategori(req: CategoryRequest, request: Request):
+    idx = get_index(request)
     if not idx.chunks:
         return {"error": "Inget index finns. Kör 'python search.py index' först.", "results": []}
 
@@ -75,7 +90,9 @@ async def api_kategori(req: CategoryRequest):
 
     try:
         from category_classifier import search_by_category
-        results = search_by_category(req.category, idx)
+        # Blockerande HTTPS-anrop till Anthropic — kör i en tråd så att
+        # samtidiga anrop inte köas bakom det
+        results = await asyncio.to_thread(search_by_category, req.category, idx)
         return {"results": results}
     except Exception as e:
         error_msg = str(e)
@@ -4,31 +4,120 @@ Extends the existing rag_engine.HybridIndex with structured loading.
 After building, chunks carry: heading, section_path, element_type.
 """
 
+import re
 import sys
+from bisect import bisect_right
+from collections import defaultdict
+from itertools import accumulate
 from pathlib import Path
 
+import numpy as np
+
 PROJECT_ROOT = Path(__file__).resolve().parents[3]
 sys.path.insert(0, str(PROJECT_ROOT))
 
 import config
-from rag_engine import HybridIndex, chunk_text, compute_file_hashes
+from rag_engine import (HybridIndex, _load_many, _supported_files, chunk_text,
+                        compute_file_fingerprints, compute_file_hashes)
 from structured_loader import load_document_structured
 
 
+# Separators never produced by the loaders — a literal query can't match across them
+_FIELD_SEP = "\x00"
+_SECTION_SEP = "\x01"
+
+
 class EnrichedIndex(HybridIndex):
     """HybridIndex with heading-aware chunks."""
 
+    def __init__(self):
+        super().__init__()
+        self._heading_blob = ""
+        self._heading_starts: list[int] = []
+        self._section_blob = ""
+        self._section_starts: list[int] = []
+        self._by_heading: dict[str, list[int]] = {}
+        # Per-chunk columns (struct-of-arrays) read by the strategies
+        self.is_body = np.zeros(0, dtype=bool)
+        self.has_heading = np.zeros(0, dtype=bool)
+        self.has_section_path = np.zeros(0, dtype=bool)
+        self.doc_rank = np.zeros(0, dtype=np.int32)
+
+    @classmethod
+    def load(cls) -> "EnrichedIndex":
+        idx = super().load()
+        idx._build_lookups()
+        return idx
+
+    def reindex(self, docs_dir: Path):
+        super().reindex(docs_dir)
+        self._build_lookups()
+
+    def _build_lookups(self):
+        """Precompute per-field search buffers used by the heading strategies.
+
+        All headings (and all section paths) are joined into one string each,
+        so a query is a single regex scan in C instead of one call per chunk.
+        """
+        self._heading_blob, self._heading_starts = _join_fields(
+            c.get("heading", "") for c in self.chunks
+        )
+        self._section_blob, self._section_starts = _join_fields(
+            _SECTION_SEP.join(c.get("section_path", [])) for c in self.chunks
+        )
+
+        by_heading: dict[str, list[int]] = defaultdict(list)
+        for i, c in enumerate(self.chunks):
+            if c.get("heading") and c.get("element_type") != "heading":
+                by_heading[c["heading"]].append(i)
+        self._by_heading = dict(by_heading)
+
+        n = len(self.chunks)
+        self.is_body = np.fromiter(
+            (c.get("element_type") != "heading" for c in self.chunks), dtype=bool, count=n)
+        self.has_heading = np.fromiter(
+            (bool(c.get("heading")) for c in self.chunks), dtype=bool, count=n)
+        self.has_section_path = np.fromiter(
+            (bool(c.get("section_path")) for c in self.chunks), dtype=bool, count=n)
+
+        # Position of each chunk in (filename, chunk_idx) order
+        order = sorted(range(n), key=lambda i: (self.chunks[i]["filename"],
+                                                self.chunks[i].get("chunk_idx", 0)))
+        self.doc_rank = np.empty(n, dtype=np.int32)
+        self.doc_rank[order] = np.arange(n, dtype=np.int32)
+
+    def match_headings(self, pattern: re.Pattern) -> list[int]:
+        """Indices of chunks whose heading matches ``pattern``."""
+        return _scan_fields(pattern, self._heading_blob, self._heading_starts)
+
+    def match_section_paths(self, pattern: re.Pattern) -> list[int]:
+        """Indices of chunks where any section_path entry matches ``pattern``."""
+        return _scan_fields(pattern, self._section_blob, self._section_starts)
+
+    def chunks_under_headings(self, headings) -> list[int]:
+        """Indices of body chunks (not headings) under any of ``headings``."""
+        return [i for h in headings for i in self._by_heading.get(h, [])]
+
+    def in_document_order(self, ids: list[int], mask: np.ndarray | None = None) -> list[int]:
+        """Keep body chunks among ``ids`` (and in ``mask``), sorted by (filename, chunk_idx)."""
+        ids = np.asarray(ids, dtype=np.intp)
+        keep = self.is_body[ids]
+        if mask is not None:
+            keep &= mask[ids]
+        ids = ids[keep]
+        return ids[np.argsort(self.doc_rank[ids], kind="stable")].tolist()
+
     def build(self, docs_dir: Path):
         """Build index using structured loading — preserves headings."""
+        fingerprints = compute_file_fingerprints(docs_dir)
         file_hashes = compute_file_hashes(docs_dir)
         self.chunks = []
         self.manifest = {}
 
-        for fpath in sorted(docs_dir.iterdir()):
-            if fpath.suffix.lower() not in config.SUPPORTED_EXTENSIONS:
-                continue
+        files = _supported_files(docs_dir)
+        parsed = _load_many(files, loader=load_document_structured)
 
-            elements = load_document_structured(fpath)
+        for fpath, elements in zip(files, parsed):
             if not elements:
                 continue
 
@@ -39,8 +128,11 @@ class EnrichedIndex(HybridIndex):
             self.chunks.extend(enriched_chunks)
             end = len(self.chunks)
 
+            size, mtime_ns = fingerprints.get(fpath.name, (0, 0))
             self.manifest[fpath.name] = {
                 "hash": file_hashes.get(fpath.name, ""),
+                "size": size,
+                "mtime_ns": mtime_ns,
                 "chunk_start": start,
                 "chunk_end": end,
             }
@@ -49,89 +141,122 @@ class EnrichedIndex(HybridIndex):
               f"{len(self.manifest)} dokument.")
 
         # Embed
-        embedder = self._get_embedder()
         texts = [c["text"] for c in self.chunks]
-        self.embeddings = embedder.embed(texts)
+        self.embeddings = self._embed_chunks(texts)
+        self._rebuild_ann()
 
         # BM25
         self.bm25.fit(texts)
+        self._build_lookups()
         self.save()
         print("Index sparat.")
 
 
+def _join_fields(values) -> tuple[str, list[int]]:
+    """Join field values into one buffer, returning it with each field's start offset."""
+    parts: list[str] = []
+    starts: list[int] = []
+    pos = 0
+    for v in values:
+        starts.append(pos)
+        parts.append(v)
+        pos += len(v) + 1
+    return _FIELD_SEP.join(parts), starts
+
+
+def _scan_fields(pattern: re.Pattern, blob: str, starts: list[int]) -> list[int]:
+    """Return indices of fields in ``blob`` containing a match, in order."""
+    if not starts:
+        return []
+    hits = []
+    pos = 0
+    while (m := pattern.search(blob, pos)) is not None:
+        i = bisect_right(starts, m.start()) - 1
+        hits.append(i)
+        if i + 1 >= len(starts):
+            break
+        # One hit per field is enough — resume at the next field
+        pos = starts[i + 1]
+    return hits
+
+
 def _elements_to_chunks(elements: list[dict], filename: str) -> list[dict]:
     """Convert structured elements into size-limited chunks with metadata.
 
     Groups consecutive elements under the same heading into chunks.
     Respects CHUNK_SIZE while keeping heading metadata.
+
+    All body words go into one flat list; a chunk is a ``[start, end)``
+    range into it, so flushing and overlap are integer updates instead of
+    list copies. The words are joined once into a document buffer and
+    each chunk's text is a slice of it.
     """
-    chunks = []
-    current_words: list[str] = []
+    words: list[str] = []
+    spans: list[tuple[int, int, str, list[str], str]] = []
+    start = 0
     current_heading = ""
     current_section_path: list[str] = []
     current_element_type = "paragraph"
-    chunk_idx = 0
 
     for elem in elements:
+        end = len(words)
+
         # Skip heading elements as standalone text — their text gets
         # included as context but we primarily index body paragraphs
         if elem["element_type"] == "heading":
             # If we have accumulated text, flush as chunk
-            if current_words:
-                chunks.append(_make_chunk(
-                    current_words, filename, chunk_idx,
-                    current_heading, current_section_path, current_element_type,
-                ))
-                chunk_idx += 1
-                current_words = []
+            if end > start:
+                spans.append((start, end, current_heading,
+                              current_section_path, current_element_type))
+                start = end
 
             current_heading = elem["heading"]
             current_section_path = elem.get("section_path", [])
             continue
 
-        words = elem["text"].split()
-        if not words:
+        elem_words = elem["text"].split()
+        if not elem_words:
             continue
 
         # If heading changed, flush current chunk
-        if elem.get("heading", "") != current_heading and current_words:
-            chunks.append(_make_chunk(
-                current_words, filename, chunk_idx,
-                current_heading, current_section_path, current_element_type,
-            ))
-            chunk_idx += 1
-            current_words = []
+        if elem.get("heading", "") != current_heading and end > start:
+            spans.append((start, end, current_heading,
+                          current_section_path, current_element_type))
+            start = end
             current_heading = elem.get("heading", "")
             current_section_path = elem.get("section_path", [])
 
         # If adding these words would exceed chunk size, flush
-        if len(current_words) + len(words) > config.CHUNK_SIZE and current_words:
-            chunks.append(_make_chunk(
-                current_words, filename, chunk_idx,
-                current_heading, current_section_path, current_element_type,
-            ))
-            chunk_idx += 1
+        if end - start + len(elem_words) > config.CHUNK_SIZE and end > start:
+            spans.append((start, end, current_heading,
+                          current_section_path, current_element_type))
             # Keep overlap
-            current_words = current_words[-config.CHUNK_OVERLAP:] if config.CHUNK_OVERLAP else []
+            start = max(start, end - config.CHUNK_OVERLAP) if config.CHUNK_OVERLAP else end
 
-        current_words.extend(words)
+        words.extend(elem_words)
         current_heading = elem.get("heading", current_heading)
         current_section_path = elem.get("section_path", current_section_path)
         current_element_type = elem.get("element_type", "paragraph")
 
     # Flush remaining
-    if current_words:
-        chunks.append(_make_chunk(
-            current_words, filename, chunk_idx,
-            current_heading, current_section_path, current_element_type,
-        ))
+    if len(words) > start:
+        spans.append((start, len(words), current_heading,
+                      current_section_path, current_element_type))
+
+    # offsets[i] = position of word i in doc_text (offsets[-1] = len + 1)
+    doc_text = " ".join(words)
+    offsets = [0, *accumulate(len(w) + 1 for w in words)]
 
-    return chunks
+    return [
+        _make_chunk(doc_text[offsets[s]:offsets[e] - 1], filename, chunk_idx,
+                    heading, section_path, element_type)
+        for chunk_idx, (s, e, heading, section_path, element_type) in enumerate(spans)
+    ]
 
 
-def _make_chunk(words, filename, chunk_idx, heading, section_path, element_type):
+def _make_chunk(text, filename, chunk_idx, heading, section_path, element_type):
     return {
-        "text": " ".join(words),
+        "text": text,
         "filename": filename,
         "chunk_idx": chunk_idx,
         "heading": heading,
@@ -8,6 +8,7 @@ Adding a new strategy = adding ONE function. Nothing else changes.
 """
 
 import re
+from functools import lru_cache
 from typing import Callable
 
 _STRATEGIES: dict[str, dict] = {}
@@ -40,6 +41,17 @@ def list_strategies() -> list[dict]:
     ]
 
 
+@lru_cache(maxsize=512)
+def _compile_query(query: str) -> re.Pattern:
+    """Case-insensitive literal pattern for a query, memoized across calls."""
+    return re.compile(re.escape(query), re.IGNORECASE)
+
+
+def _query_pattern(query: str) -> re.Pattern:
+    # Normalize before the cache so "Kvalitet" and " kvalitet" share an entry
+    return _compile_query(query.strip().lower())
+
+
 # -----------------------------------------------------------------------
 # Built-in strategies
 # -----------------------------------------------------------------------
@@ -57,22 +69,15 @@ def strategy_heading(query: str, index, top_k: int = 20, **kwargs) -> list[dict]
     Returnerar hela stycken under matchande rubriker, sorterade
     efter dokument och position.
     """
-    pattern = re.compile(re.escape(query), re.IGNORECASE)
+    pattern = _query_pattern(query)
 
-    matches = []
-    for chunk in index.chunks:
-        heading = chunk.get("heading", "")
-        if heading and pattern.search(heading):
-            # Inkludera bara body-text, inte rubrikerna själva
-            if chunk.get("element_type") != "heading":
-                matches.append({
-                    **chunk,
-                    "score": 1.0,
-                    "match_type": "heading_keyword",
-                })
-
-    matches.sort(key=lambda c: (c["filename"], c.get("chunk_idx", 0)))
-    return matches[:top_k]
+    # Inkludera bara body-text, inte rubrikerna själva
+    ids = index.in_document_order(index.match_headings(pattern),
+                                  mask=index.has_heading)
+    return [
+        {**index.chunks[i], "score": 1.0, "match_type": "heading_keyword"}
+        for i in ids[:top_k]
+    ]
 
 
 @register_strategy("heading_semantic", "Semantisk rubrik-match → alla stycken under")
@@ -97,17 +102,11 @@ def strategy_heading_semantic(query: str, index, top_k: int = 20, **kwargs) -> l
         return candidates[:top_k]
 
     # Steg 3: Returnera alla body-chunks under de rubrikerna
-    results = []
-    for chunk in index.chunks:
-        if chunk.get("heading") in top_headings and chunk.get("element_type") != "heading":
-            results.append({
-                **chunk,
-                "score": 1.0,
-                "match_type": "heading_semantic",
-            })
-
-    results.sort(key=lambda c: (c["filename"], c.get("chunk_idx", 0)))
-    return results[:top_k]
+    ids = index.in_document_order(index.chunks_under_headings(top_headings))
+    return [
+        {**index.chunks[i], "score": 1.0, "match_type": "heading_semantic"}
+        for i in ids[:top_k]
+    ]
 
 
 @register_strategy("section_path", "Stycken vars sektion matchar nyckelord")
@@ -117,18 +116,11 @@ def strategy_section_path(query: str, index, top_k: int = 20, **kwargs) -> list[
     T.ex. query="Leverans" matchar chunks under "3. Leveransvillkor"
     oavsett om det är i heading eller section_path.
     """
-    pattern = re.compile(re.escape(query), re.IGNORECASE)
-
-    matches = []
-    for chunk in index.chunks:
-        section_path = chunk.get("section_path", [])
-        if any(pattern.search(s) for s in section_path):
-            if chunk.get("element_type") != "heading":
-                matches.append({
-                    **chunk,
-                    "score": 1.0,
-                    "match_type": "section_path",
-                })
-
-    matches.sort(key=lambda c: (c["filename"], c.get("chunk_idx", 0)))
-    return matches[:top_k]
+    pattern = _query_pattern(query)
+
+    ids = index.in_document_order(index.match_section_paths(pattern),
+                                  mask=index.has_section_path)
+    return [
+        {**index.chunks[i], "score": 1.0, "match_type": "section_path"}
+        for i in ids[:top_k]
+    ]
@@ -74,62 +74,65 @@ def load_pdf_structured(path: Path) -> list[dict]:
     current_heading = ""
     section_stack: list[str] = []
 
-    with pdfplumber.open(path) as pdf:
-        # Pass 1: find the body font size (most common) across all pages
-        size_counts: dict[float, int] = {}
-        for page in pdf.pages:
-            for char in page.chars:
-                s = round(char["size"], 1)
-                size_counts[s] = size_counts.get(s, 0) + 1
-
-        if not size_counts:
-            return elements
-
-        body_size = max(size_counts, key=size_counts.get)
+    # Single pass over the PDF: extract words per page and build the
+    # font-size histogram from those same words (weighted by character count)
+    size_counts: dict[float, int] = {}
+    page_lines: list[tuple[int, list[dict]]] = []
 
-        # Pass 2: extract text with heading detection
+    with pdfplumber.open(path) as pdf:
         for page_num, page in enumerate(pdf.pages, start=1):
             words = page.extract_words(extra_attrs=["size", "fontname"])
             if not words:
                 continue
 
-            lines = _group_words_into_lines(words)
-
-            for line in lines:
-                text = line["text"].strip()
-                if not text:
-                    continue
-
-                avg_size = line["avg_size"]
-                is_heading = (
-                    avg_size > body_size + 1.0
-                    and len(text) < 150
-                )
-
-                if is_heading:
-                    section_stack = [text]
-                    current_heading = text
-
-                    elements.append({
-                        "text": text,
-                        "heading": text,
-                        "heading_level": 1,
-                        "section_path": section_stack[:],
-                        "element_type": "heading",
-                        "page": page_num,
-                    })
-                else:
-                    # Detect bullet points
-                    el_type = "list_item" if _is_bullet(text) else "paragraph"
-
-                    elements.append({
-                        "text": text,
-                        "heading": current_heading,
-                        "heading_level": 1 if current_heading else 0,
-                        "section_path": section_stack[:],
-                        "element_type": el_type,
-                        "page": page_num,
-                    })
+            for w in words:
+                s = round(w["size"], 1)
+                size_counts[s] = size_counts.get(s, 0) + len(w["text"])
+
+            page_lines.append((page_num, _group_words_into_lines(words)))
+
+    if not size_counts:
+        return elements
+
+    # Body font size = most common size; classify lines once it is known
+    body_size = max(size_counts, key=size_counts.get)
+
+    for page_num, lines in page_lines:
+        for line in lines:
+            text = line["text"].strip()
+            if not text:
+                continue
+
+            avg_size = line["avg_size"]
+            is_heading = (
+                avg_size > body_size + 1.0
+                and len(text) < 150
+            )
+
+            if is_heading:
+                section_stack = [text]
+                current_heading = text
+
+                elements.append({
+                    "text": text,
+                    "heading": text,
+                    "heading_level": 1,
+                    "section_path": section_stack[:],
+                    "element_type": "heading",
+                    "page": page_num,
+                })
+            else:
+                # Detect bullet points
+                el_type = "list_item" if _is_bullet(text) else "paragraph"
+
+                elements.append({
+                    "text": text,
+                    "heading": current_heading,
+                    "heading_level": 1 if current_heading else 0,
+                    "section_path": section_stack[:],
+                    "element_type": el_type,
+                    "page": page_num,
+                })
 
     return elements
 
@@ -164,11 +167,13 @@ def _make_line(words: list[dict]) -> dict:
     return {"text": text, "avg_size": avg_size}
 
 
-_BULLET_RE = re.compile(r'^[\u2022\u2023\u25E6\u2043\u2219•\-–—]\s*')
+# Same characters as the former regex ^[\u2022\u2023\u25E6\u2043\u2219•\-–—] —
+# a first-character set lookup needs no regex engine per line
+_BULLET_CHARS = frozenset("\u2022\u2023\u25E6\u2043\u2219•-–—")
 
 
 def _is_bullet(text: str) -> bool:
-    return bool(_BULLET_RE.match(text))
+    return text[:1] in _BULLET_CHARS
 
 
 def load_document_structured(path: Path) -> list[dict]:
@@ -5,6 +5,7 @@ Användning:
   python demo.py list                              # Lista prompter
   python demo.py show <prompt>                     # Visa prompt-definition
   python demo.py search <prompt> <fråga>           # Kör prompt-sökning
+  python demo.py multi <fråga> <prompt> [<prompt> ...]  # Samma fråga mot flera prompter
 
 Exempel:
   python demo.py list
@@ -12,6 +13,7 @@ Exempel:
   python demo.py search kvalitetssäkring "kvalitetskontroll"
   python demo.py search miljökrav "kemiska produkter"
   python demo.py search säkerhet "skyddsronder"
+  python demo.py multi "leverantörens ansvar" kvalitetssäkring miljökrav säkerhet
 """
 
 import sys
@@ -24,7 +26,8 @@ sys.path.insert(0, str(PROJECT_ROOT))
 sys.path.insert(0, str(EXP002_SRC))
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 
-from prompt_engine import list_prompts, load_prompt, search_with_prompt
+from prompt_engine import (list_prompts, load_prompt, search_with_prompt,
+                           search_with_prompts_batch)
 from enhanced_index import EnrichedIndex
 
 
@@ -72,13 +75,53 @@ def cmd_search(prompt_name: str, query: str):
     try:
         results = search_with_prompt(prompt_name, query, idx)
     except Exception as e:
-        error_msg = str(e)
-        if "api_key" in error_msg.lower() or "ANTHROPIC_API_KEY" in error_msg:
-            print("Fel: ANTHROPIC_API_KEY saknas.")
-            print("Sätt med: export ANTHROPIC_API_KEY=sk-ant-...")
+        if _missing_api_key(e):
             return
         raise
 
+    _print_results(results)
+
+
+def cmd_multi(query: str, prompt_names: list[str]):
+    idx = EnrichedIndex.load()
+    if not idx.chunks:
+        print("Inget index. Kör EXP-002: python demo.py build")
+        return
+
+    for name in prompt_names:
+        try:
+            load_prompt(name)
+        except FileNotFoundError as e:
+            print(f"Fel: {e}")
+            return
+
+    print(f"Sökfråga: \"{query}\"")
+    print(f"Prompter: {', '.join(prompt_names)}")
+    print(f"Hämtar kandidater, bedömer parallellt med Claude...\n")
+
+    try:
+        all_results = search_with_prompts_batch(
+            prompt_names, [query] * len(prompt_names), idx)
+    except Exception as e:
+        if _missing_api_key(e):
+            return
+        raise
+
+    for name, results in zip(prompt_names, all_results):
+        print(f"=== {name} ===")
+        _print_results(results)
+
+
+def _missing_api_key(e: Exception) -> bool:
+    error_msg = str(e)
+    if "api_key" in error_msg.lower() or "ANTHROPIC_API_KEY" in error_msg:
+        print("Fel: ANTHROPIC_API_KEY saknas.")
+        print("Sätt med: export ANTHROPIC_API_KEY=sk-ant-...")
+        return True
+    return False
+
+
+def _print_results(results: list[dict]):
     if not results:
         print("Inga relevanta resultat hittades.")
         return
@@ -116,6 +159,11 @@ def main():
         prompt_name = sys.argv[2]
         query = " ".join(sys.argv[3:])
         cmd_search(prompt_name, query)
+    elif cmd == "multi":
+        if len(sys.argv) < 4:
+            print("Användning: python demo.py multi <fråga> <prompt-namn> [<prompt-namn> ...]")
+            sys.exit(1)
+        cmd_multi(sys.argv[2], sys.argv[3:])
     else:
         print(f"Okänt kommando: {cmd}")
         print(__doc__)
@@ -8,6 +8,7 @@ Loads search definitions from YAML files and executes them:
 New search = new YAML file. No code changes needed.
 """
 
+import asyncio
 import json
 import sys
 from pathlib import Path
@@ -15,6 +16,11 @@ from pathlib import Path
 import yaml
 import anthropic
 
+try:
+    import orjson
+except ImportError:  # valfritt — stdlib json används som fallback
+    orjson = None
+
 # Project and experiment paths
 PROJECT_ROOT = Path(__file__).resolve().parents[3]
 EXP002_SRC = PROJECT_ROOT / "experiments" / "EXP-002_heading-search" / "src"
@@ -26,6 +32,12 @@ from search_strategies import get_strategy
 
 PROMPTS_DIR = Path(__file__).resolve().parent.parent / "prompts"
 
+# Shared across calls: keeps the HTTP connection pool warm between searches
+client = anthropic.Anthropic()
+
+# Claude requests in flight at once in search_with_prompts_batch
+MAX_CONCURRENT_EVALUATIONS = 8
+
 SYSTEM_PROMPT = """Du är expert på att analysera svenska upphandlingsdokument och ramavtal.
 
 Din uppgift: Givet en sökbeskrivning och ett antal textpassager, bedöm hur relevant varje passage är.
@@ -105,8 +117,7 @@ def search_with_prompt(prompt_name: str, query: str, index) -> list[dict]:
     definition = load_prompt(prompt_name)
 
     # Step 1: Retrieval
-    strategy_fn = get_strategy(definition["retrieval"])
-    candidates = strategy_fn(query, index, top_k=definition["top_k_retrieval"])
+    candidates = _retrieve(definition, query, index)
 
     if not candidates:
         return []
@@ -115,17 +126,129 @@ def search_with_prompt(prompt_name: str, query: str, index) -> list[dict]:
     evaluated = _evaluate_with_claude(candidates, query, definition)
 
     # Step 3: Filter and sort
+    return _filter_relevant(evaluated, definition)
+
+
+def search_with_prompts_batch(prompt_names: list[str], queries: list[str],
+                              index) -> list[list[dict]]:
+    """Execute several prompt-driven searches, one result list per (prompt, query).
+
+    Retrieval runs locally one search at a time; the Claude evaluations
+    are sent concurrently, so total latency is close to the slowest call
+    instead of the sum of all calls. Starts its own event loop — callers
+    already inside one (e.g. FastAPI) await ``search_with_prompts_async``.
+    """
+    return asyncio.run(search_with_prompts_async(prompt_names, queries, index))
+
+
+async def search_with_prompts_async(prompt_names: list[str], queries: list[str],
+                                    index) -> list[list[dict]]:
+    """Coroutine behind ``search_with_prompts_batch``, for running event loops.
+
+    Retrieval is synchronous and runs on the calling loop.
+    """
+    definitions = [load_prompt(name) for name in prompt_names]
+    candidates = [_retrieve(d, q, index) for d, q in zip(definitions, queries)]
+    limit = asyncio.Semaphore(MAX_CONCURRENT_EVALUATIONS)
+
+    # One client per batch: its connection pool belongs to this event loop
+    async with anthropic.AsyncAnthropic() as async_client:
+        async def evaluate(chunks, query, definition):
+            if not chunks:
+                return []
+            async with limit:
+                evaluated = await _evaluate_with_claude_async(
+                    async_client, chunks, query, definition)
+            return _filter_relevant(evaluated, definition)
+
+        return await asyncio.gather(*(
+            evaluate(chunks, query, definition)
+            for chunks, query, definition in zip(candidates, queries, definitions)
+        ))
+
+
+def _retrieve(definition: dict, query: str, index) -> list[dict]:
+    strategy_fn = get_strategy(definition["retrieval"])
+    return strategy_fn(query, index, top_k=definition["top_k_retrieval"])
+
+
+def _filter_relevant(evaluated: list[dict], definition: dict) -> list[dict]:
     threshold = definition["threshold"]
     relevant = [c for c in evaluated if c.get("relevance", 0) >= threshold]
     relevant.sort(key=lambda x: -x["relevance"])
-
     return relevant[:definition["top_k_results"]]
 
 
 def _evaluate_with_claude(chunks: list[dict], query: str, definition: dict) -> list[dict]:
     """Send chunks to Claude for evaluation against the prompt definition."""
-    client = anthropic.Anthropic()
+    response = client.messages.create(
+        model=config.CLAUDE_MODEL,
+        max_tokens=4096,
+        system=SYSTEM_PROMPT,
+        messages=[{"role": "user", "content": _build_user_prompt(chunks, query, definition)}],
+    )
 
+    return _merge_scores(chunks, _parse_scores(response.content[0].text))
+
+
+async def _evaluate_with_claude_async(client: anthropic.AsyncAnthropic, chunks: list[dict],
+                                      query: str, definition: dict) -> list[dict]:
+    """Async variant of ``_evaluate_with_claude`` on a shared AsyncAnthropic client.
+
+    The response is streamed and parsed as soon as the JSON list closes,
+    without waiting for any trailing text.
+    """
+    acc = _StreamingJsonAccumulator()
+    scores = None
+    async with client.messages.stream(
+        model=config.CLAUDE_MODEL,
+        max_tokens=4096,
+        system=SYSTEM_PROMPT,
+        messages=[{"role": "user", "content": _build_user_prompt(chunks, query, definition)}],
+    ) as stream:
+        async for delta in stream.text_stream:
+            acc.append(delta)
+            scores = acc.try_parse()
+            if scores is not None:
+                break
+
+    if scores is None:
+        # Stream ended without a parseable list — let the parser raise
+        scores = _parse_scores(acc.text())
+    return _merge_scores(chunks, scores)
+
+
+class _StreamingJsonAccumulator:
+    """Collect streamed text deltas and parse the JSON list once it is complete.
+
+    Deltas are kept in a list (O(1) per append) and only joined when the
+    tail looks like the closing bracket, so the response isn't re-parsed
+    from the start on every delta.
+    """
+
+    def __init__(self):
+        self._parts: list[str] = []
+
+    def append(self, delta: str):
+        if delta:
+            self._parts.append(delta)
+
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def try_parse(self) -> list[dict] | None:
+        # The reply is a JSON list; "}" also closes every item, so only "]" counts
+        tail = "".join(self._parts[-2:]).rstrip().removesuffix("```").rstrip()
+        if not tail.endswith("]"):
+            return None
+        try:
+            return _parse_scores(self.text())
+        except ValueError:
+            # A "]" inside a string or a nested list — keep reading
+            return None
+
+
+def _build_user_prompt(chunks: list[dict], query: str, definition: dict) -> str:
     passages = "\n\n".join(
         f"[{i}] (Källa: {c['filename']}"
         f"{' | Rubrik: ' + c['heading'] if c.get('heading') else ''})\n"
@@ -143,23 +266,22 @@ Bedöm relevansen (0-10) för varje passage nedan mot sökbeskrivningen:
 
 Svara med JSON-lista. Inkludera alla {len(chunks)} passager."""
 
-    response = client.messages.create(
-        model=config.CLAUDE_MODEL,
-        max_tokens=4096,
-        system=SYSTEM_PROMPT,
-        messages=[{"role": "user", "content": user_prompt}],
-    )
+    return user_prompt
 
-    response_text = response.content[0].text
 
+def _parse_scores(response_text: str) -> list[dict]:
     # Parse JSON (handle markdown code blocks)
     text = response_text.strip()
     if text.startswith("```"):
         text = text.split("\n", 1)[1]
         text = text.rsplit("```", 1)[0]
 
-    scores = json.loads(text)
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
 
+def _merge_scores(chunks: list[dict], scores: list[dict]) -> list[dict]:
     # Merge scores into chunks
     score_map = {item["index"]: item for item in scores}
     results = []
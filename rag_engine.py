@@ -1,8 +1,11 @@
 import hashlib
 import json
-import math
+import os
 import re
-from collections import Counter
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
 
 import numpy as np
@@ -10,6 +13,16 @@ import pdfplumber
 from docx import Document
 from sentence_transformers import SentenceTransformer
 
+try:
+    import orjson
+except ImportError:  # valfritt — stdlib json används som fallback
+    orjson = None
+
+try:
+    import faiss
+except ImportError:  # valfritt — utan faiss används exakt (brute force) sökning
+    faiss = None
+
 import config
 
 
@@ -42,45 +55,123 @@ def load_document(path: Path) -> str:
         raise ValueError(f"Unsupported file type: {ext}")
 
 
+def _load_many(paths: list[Path], loader=load_document) -> list:
+    # Parsing is CPU-bound and independent per file — one process per
+    # core. ex.map preserves input order. A single file isn't worth a pool.
+    # ``loader`` must be a module-level function so it can be pickled.
+    if len(paths) <= 1:
+        return [loader(p) for p in paths]
+    workers = min(os.cpu_count() or 1, len(paths))
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(loader, paths))
+
+
+def _supported_files(folder: Path) -> list[Path]:
+    return [f for f in sorted(folder.iterdir())
+            if f.suffix.lower() in config.SUPPORTED_EXTENSIONS]
+
+
 def load_documents(folder: Path) -> list[dict]:
-    docs = []
-    for f in sorted(folder.iterdir()):
-        if f.suffix.lower() in config.SUPPORTED_EXTENSIONS:
-            text = load_document(f)
-            if text.strip():
-                docs.append({"filename": f.name, "text": text})
-    return docs
+    files = _supported_files(folder)
+    return [{"filename": f.name, "text": text}
+            for f, text in zip(files, _load_many(files))
+            if text.strip()]
 
 
 # ---------------------------------------------------------------------------
-# Chunking – sentence-aware
+# Extracted-text cache – INDEX_DIR/text_cache/v<N>/<sha256>.txt
 # ---------------------------------------------------------------------------
 
-_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+# Bump when load_pdf/load_docx change their output, so text extracted by
+# the old code is no longer served for unchanged files
+TEXT_CACHE_VERSION = 1
 
 
-def chunk_text(text: str, chunk_size: int = config.CHUNK_SIZE,
-               overlap: int = config.CHUNK_OVERLAP) -> list[str]:
-    sentences = _SENTENCE_RE.split(text)
-    chunks: list[str] = []
-    current_words: list[str] = []
+def _text_cache_root() -> Path:
+    return config.INDEX_DIR / "text_cache"
 
-    for sentence in sentences:
-        words = sentence.split()
-        if not words:
-            continue
 
-        if len(current_words) + len(words) > chunk_size and current_words:
-            chunks.append(" ".join(current_words))
-            # keep overlap words from end
-            current_words = current_words[-overlap:] if overlap else []
+def _text_cache_dir() -> Path:
+    return _text_cache_root() / f"v{TEXT_CACHE_VERSION}"
+
+
+def _store_cached_text(file_hash: str, text: str):
+    cache_dir = _text_cache_dir()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # Write then rename, so an interrupted run never leaves a truncated entry
+    tmp = cache_dir / f"{file_hash}.tmp"
+    tmp.write_text(text, encoding="utf-8")
+    tmp.replace(cache_dir / f"{file_hash}.txt")
+
+
+def _read_cached_text(file_hash: str) -> str | None:
+    cached = _text_cache_dir() / f"{file_hash}.txt"
+    return cached.read_text(encoding="utf-8") if cached.exists() else None
 
-        current_words.extend(words)
 
-    if current_words:
-        chunks.append(" ".join(current_words))
+def _load_many_cached(paths: list[Path], file_hashes: dict[str, str]) -> list[str]:
+    # Cache hits are plain file reads; only misses go to the parser pool
+    texts = {p: _read_cached_text(file_hashes[p.name]) for p in paths}
+    misses = [p for p, text in texts.items() if text is None]
+    for p, text in zip(misses, _load_many(misses)):
+        _store_cached_text(file_hashes[p.name], text)
+        texts[p] = text
+    return [texts[p] for p in paths]
+
+
+def clean_text_cache(keep_hashes: set[str]) -> int:
+    """Delete cached texts whose hash is not in ``keep_hashes``, and every
+    entry from older cache versions; returns the number of files removed."""
+    root = _text_cache_root()
+    if not root.exists():
+        return 0
+    current = _text_cache_dir()
+    removed = 0
+    for f in sorted(root.rglob("*"), reverse=True):  # files before their dirs
+        if f.is_dir():
+            if f != current:
+                f.rmdir()
+        elif f.parent != current or f.stem not in keep_hashes:
+            f.unlink()
+            removed += 1
+    return removed
+
+
+# ---------------------------------------------------------------------------
+# Chunking – sentence-aware
+# ---------------------------------------------------------------------------
+
+_SENTENCE_END = ".!?"
+
+
+def chunk_text(text: str, chunk_size: int = config.CHUNK_SIZE,
+               overlap: int = config.CHUNK_OVERLAP) -> list[str]:
+    """Split ``text`` into ~``chunk_size``-word chunks on sentence boundaries.
+
+    One whitespace split of the whole text; a sentence ends at every word
+    ending in ``.``, ``!`` or ``?``. Chunks are tracked as ``[start, end)``
+    word ranges, so no per-sentence lists are built.
+    """
+    words = text.split()
+    if not words:
+        return []
+
+    # Word index just past each sentence
+    sentence_ends = [i for i, w in enumerate(words, 1) if w[-1] in _SENTENCE_END]
+    if not sentence_ends or sentence_ends[-1] != len(words):
+        sentence_ends.append(len(words))
+
+    spans: list[tuple[int, int]] = []
+    start = end = 0
+    for sentence_end in sentence_ends:
+        if sentence_end - start > chunk_size and end > start:
+            spans.append((start, end))
+            # keep overlap words from end
+            start = max(start, end - overlap) if overlap else end
+        end = sentence_end
+    spans.append((start, end))
 
-    return chunks
+    return [" ".join(words[s:e]) for s, e in spans]
 
 
 # ---------------------------------------------------------------------------
@@ -88,17 +179,70 @@ def chunk_text(text: str, chunk_size: int = config.CHUNK_SIZE,
 # ---------------------------------------------------------------------------
 
 class SwedishEmbedder:
-    def __init__(self):
-        print(f"Laddar embedding-modell: {config.EMBEDDING_MODEL}...")
-        self._model = SentenceTransformer(config.EMBEDDING_MODEL)
+    def __init__(self, device: str | None = config.EMBEDDING_DEVICE,
+                 backend: str = config.EMBEDDING_BACKEND):
+        print(f"Laddar embedding-modell: {config.EMBEDDING_MODEL} ({backend})...")
+        if backend == "onnx":
+            self._model = _load_onnx_model(device)
+        else:
+            self._model = SentenceTransformer(config.EMBEDDING_MODEL, device=device)
 
     def embed(self, texts: list[str]) -> np.ndarray:
-        return self._model.encode(texts, show_progress_bar=True,
-                                  convert_to_numpy=True)
+        # encode() runs the forward pass in fixed-size batches; only show
+        # a progress bar when there is more than one batch (not for queries)
+        return self._model.encode(texts, batch_size=config.EMBEDDING_BATCH_SIZE,
+                                  show_progress_bar=len(texts) > config.EMBEDDING_BATCH_SIZE,
+                                  convert_to_numpy=True, normalize_embeddings=True)
+
+    @lru_cache(maxsize=config.QUERY_CACHE_SIZE)
+    def embed_query(self, query: str) -> np.ndarray:
+        """Unit-length float32 vector for one query, cached per query string."""
+        q_emb = np.asarray(self.embed([query])[0], dtype=np.float32)
+        # Shared between callers via the cache — must not be mutated
+        q_emb.flags.writeable = False
+        return q_emb
+
+
+_embedder_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _shared_embedder(model_name: str, device: str | None, backend: str) -> SwedishEmbedder:
+    return SwedishEmbedder(device=device, backend=backend)
+
+
+def get_embedder() -> SwedishEmbedder:
+    """Process-wide embedder for the configured model, loaded on first use."""
+    # The lock keeps concurrent first searches (GUI threads) from loading twice
+    with _embedder_lock:
+        return _shared_embedder(config.EMBEDDING_MODEL, config.EMBEDDING_DEVICE,
+                                config.EMBEDDING_BACKEND)
+
+
+def _load_onnx_model(device: str | None) -> SentenceTransformer:
+    """ONNX Runtime model, exported (and int8-quantized) once and cached under INDEX_DIR."""
+    # One directory per model, so changing EMBEDDING_MODEL never reuses
+    # another model's export
+    onnx_dir = config.INDEX_DIR / "embedder-onnx" / config.EMBEDDING_MODEL.replace("/", "--")
+    if config.EMBEDDING_ONNX_QUANTIZE:
+        file_name = "onnx/model_qint8_avx512_vnni.onnx"
+    else:
+        file_name = "onnx/model.onnx"
+
+    if not (onnx_dir / file_name).exists():
+        print("Exporterar modellen till ONNX (engångsjobb)...")
+        model = SentenceTransformer(config.EMBEDDING_MODEL, device=device, backend="onnx")
+        model.save(str(onnx_dir))
+        if config.EMBEDDING_ONNX_QUANTIZE:
+            # Export helpers need optimum[onnxruntime]; only imported on this path
+            from sentence_transformers import export_dynamic_quantized_onnx_model
+            export_dynamic_quantized_onnx_model(model, "avx512_vnni", str(onnx_dir))
+    return SentenceTransformer(str(onnx_dir), device=device, backend="onnx",
+                               model_kwargs={"file_name": file_name})
 
 
 # ---------------------------------------------------------------------------
-# BM25 (Okapi BM25, pure Python)
+# BM25 (Okapi BM25, NumPy)
 # ---------------------------------------------------------------------------
 
 _TOKEN_RE = re.compile(r'\w+', re.UNICODE)
@@ -108,54 +252,159 @@ def _tokenize(text: str) -> list[str]:
     return _TOKEN_RE.findall(text.lower())
 
 
+def _top_k(scores: np.ndarray, k: int) -> list[tuple[int, float]]:
+    """The ``k`` highest scores as (index, score), descending, ties by index."""
+    n = len(scores)
+    k = min(k, n)
+    if k <= 0:
+        return []
+    # O(n) selection; ties at the cut-off go to the lowest indices, like a stable sort
+    threshold = np.partition(scores, n - k)[n - k]
+    above = np.flatnonzero(scores > threshold)
+    tied = np.flatnonzero(scores == threshold)[:k - len(above)]
+    idx = np.concatenate((above, tied))
+    idx = idx[np.lexsort((idx, -scores[idx]))]
+    return list(zip(idx.tolist(), scores[idx].tolist()))
+
+
 class BM25:
+    """Okapi BM25 over a term-major CSR posting matrix.
+
+    Postings for term ``t`` are ``_doc_ids[_indptr[t]:_indptr[t + 1]]``
+    with matching ``_freqs``, so scoring a query term is one contiguous
+    slice and one vectorized update instead of a scan over all documents.
+    Doc ids, term frequencies and document lengths are int32 (4 bytes per
+    posting each); only the derived weights are float64.
+    """
+
     def __init__(self, k1: float = 1.5, b: float = 0.75):
         self.k1 = k1
         self.b = b
-        self._doc_freqs: dict[str, int] = {}
-        self._doc_lens: list[int] = []
+        self._vocab: dict[str, int] = {}
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._doc_ids = np.zeros(0, dtype=np.int32)
+        self._freqs = np.zeros(0, dtype=np.int32)
+        self._idf = np.zeros(0, dtype=np.float64)
+        self._doc_lens = np.zeros(0, dtype=np.int32)
+        self._norm = np.zeros(0, dtype=np.float64)
         self._avg_dl: float = 0.0
-        self._tf: list[Counter] = []
         self._n_docs: int = 0
 
     def fit(self, texts: list[str]):
-        self._tf = []
-        self._doc_lens = []
-        df: dict[str, int] = {}
-
-        for text in texts:
-            tokens = _tokenize(text)
-            tf = Counter(tokens)
-            self._tf.append(tf)
-            self._doc_lens.append(len(tokens))
-            for term in set(tokens):
-                df[term] = df.get(term, 0) + 1
-
-        self._doc_freqs = df
-        self._n_docs = len(texts)
-        self._avg_dl = sum(self._doc_lens) / max(self._n_docs, 1)
+        self._vocab = {}
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._doc_ids = np.zeros(0, dtype=np.int32)
+        self._freqs = np.zeros(0, dtype=np.int32)
+        self._doc_lens = np.zeros(0, dtype=np.int32)
+        self.add_docs(texts)
+
+    def add_docs(self, texts: list[str]):
+        """Append documents; only ``texts`` are tokenized, existing postings are reused."""
+        first = len(self._doc_lens)
+        n_new = len(texts)
+        tokens = [_tokenize(text) for text in texts]
+        doc_lens = np.fromiter(map(len, tokens), dtype=np.int32, count=n_new)
+
+        # One flat pass maps every token to a term id (new terms get the next id)
+        vocab = self._vocab
+        get_id = vocab.setdefault
+        token_terms = np.array([get_id(tok, len(vocab)) for tok in chain.from_iterable(tokens)],
+                               dtype=np.int64)
+        token_docs = np.repeat(np.arange(n_new, dtype=np.int64), doc_lens)
+
+        # Distinct (term, doc) keys with their counts are the (term, doc, freq) triples
+        stride = max(n_new, 1)
+        keys, freqs = np.unique(token_terms * stride + token_docs, return_counts=True)
+        term_ids = keys // stride
+        doc_ids = keys % stride + first
+
+        # Existing postings first: the stable sort then keeps doc ids ascending
+        self._set_postings(
+            np.concatenate((self._term_ids(), term_ids)),
+            np.concatenate((self._doc_ids, doc_ids.astype(np.int32))),
+            np.concatenate((self._freqs, freqs.astype(np.int32))),
+            np.concatenate((self._doc_lens, doc_lens)),
+        )
 
-    def search(self, query: str, top_k: int = 20) -> list[tuple[int, float]]:
-        query_tokens = _tokenize(query)
-        scores = [0.0] * self._n_docs
+    def remove_docs(self, keep: np.ndarray):
+        """Drop documents where the boolean mask ``keep`` is False and renumber the rest."""
+        keep = np.asarray(keep, dtype=bool)
+        new_ids = (np.cumsum(keep) - 1).astype(np.int32)
+        live = keep[self._doc_ids]
+        # Terms left without postings stay in the vocabulary with df = 0
+        self._set_postings(self._term_ids()[live], new_ids[self._doc_ids[live]],
+                           self._freqs[live], self._doc_lens[keep])
+
+    def _postings(self, t: int) -> tuple[np.ndarray, np.ndarray]:
+        """(doc ids, term frequencies) for term id ``t`` — views, no copy."""
+        start, end = self._indptr[t], self._indptr[t + 1]
+        return self._doc_ids[start:end], self._freqs[start:end]
+
+    def _term_ids(self) -> np.ndarray:
+        # Expand indptr back to one term id per posting
+        return np.repeat(np.arange(len(self._indptr) - 1, dtype=np.int64),
+                         np.diff(self._indptr))
+
+    def _set_postings(self, term_ids: np.ndarray, doc_ids: np.ndarray,
+                      freqs: np.ndarray, doc_lens: np.ndarray):
+        """Build CSR arrays and per-term/per-doc weights from (term, doc, freq) triples."""
+        n_terms = len(self._vocab)
+        order = np.argsort(term_ids, kind="stable")   # doc ids stay ascending per term
+        self._doc_ids = doc_ids[order].astype(np.int32, copy=False)
+        self._freqs = freqs[order].astype(np.int32, copy=False)
+
+        df = np.bincount(term_ids, minlength=n_terms)
+        self._indptr = np.concatenate(([0], np.cumsum(df)))
+        self._set_weights(doc_lens)
+
+    def _set_weights(self, doc_lens: np.ndarray):
+        """Derive idf and per-document normalization from the postings and lengths."""
+        df = np.diff(self._indptr)
+        doc_lens = doc_lens.astype(np.int32, copy=False)
+        self._n_docs = len(doc_lens)
+        self._doc_lens = doc_lens
+        self._avg_dl = float(doc_lens.sum()) / max(self._n_docs, 1)
+        self._idf = np.log((self._n_docs - df + 0.5) / (df + 0.5) + 1.0)
+        # Per-document length normalization: k1 * (1 - b + b * dl / avg_dl)
+        self._norm = self.k1 * (1 - self.b + self.b * doc_lens / (self._avg_dl or 1.0))
 
-        for term in query_tokens:
-            if term not in self._doc_freqs:
-                continue
-            df = self._doc_freqs[term]
-            idf = math.log((self._n_docs - df + 0.5) / (df + 0.5) + 1.0)
+    def search(self, query: str, top_k: int = 20) -> list[tuple[int, float]]:
+        term_ids = [t for t in map(self._vocab.get, _tokenize(query)) if t is not None]
+        if not term_ids:
+            return []
 
-            for i, tf in enumerate(self._tf):
-                if term not in tf:
-                    continue
-                freq = tf[term]
-                dl = self._doc_lens[i]
-                numerator = freq * (self.k1 + 1)
-                denominator = freq + self.k1 * (1 - self.b + self.b * dl / self._avg_dl)
-                scores[i] += idf * numerator / denominator
+        # All query terms' postings in query order, scored in one vectorized
+        # pass; bincount then sums per document in that same order
+        postings = [self._postings(t) for t in term_ids]
+        docs = np.concatenate([d for d, _ in postings])
+        freqs = np.concatenate([f for _, f in postings])
+        idf = np.repeat(self._idf[term_ids], [len(d) for d, _ in postings])
+        contrib = idf * (freqs * (self.k1 + 1)) / (freqs + self._norm[docs])
+        scores = np.bincount(docs, weights=contrib, minlength=self._n_docs)
+
+        return [(i, s) for i, s in _top_k(scores, top_k) if s > 0]
+
+    def save(self, path: Path):
+        # Terms are \w+ tokens, so a newline-joined UTF-8 buffer holds the
+        # vocabulary without pickling (ids are positions in the list)
+        terms = "\n".join(sorted(self._vocab, key=self._vocab.get))
+        np.savez(path,
+                 vocab=np.frombuffer(terms.encode("utf-8"), dtype=np.uint8),
+                 indptr=self._indptr, doc_ids=self._doc_ids, freqs=self._freqs,
+                 doc_lens=self._doc_lens, params=np.array([self.k1, self.b]))
 
-        ranked = sorted(enumerate(scores), key=lambda x: -x[1])
-        return [(i, s) for i, s in ranked[:top_k] if s > 0]
+    @classmethod
+    def load(cls, path: Path) -> "BM25":
+        with np.load(path, allow_pickle=False) as data:
+            k1, b = data["params"].tolist()
+            bm25 = cls(k1=k1, b=b)
+            terms = data["vocab"].tobytes().decode("utf-8")
+            bm25._vocab = {t: i for i, t in enumerate(terms.split("\n"))} if terms else {}
+            bm25._indptr = data["indptr"]
+            bm25._doc_ids = data["doc_ids"].astype(np.int32, copy=False)
+            bm25._freqs = data["freqs"].astype(np.int32, copy=False)
+            bm25._set_weights(data["doc_lens"])
+        return bm25
 
 
 # ---------------------------------------------------------------------------
@@ -176,19 +425,114 @@ def rrf_fuse(ranked_lists: list[list[tuple[int, float]]],
 # ---------------------------------------------------------------------------
 
 def _file_hash(path: Path) -> str:
-    h = hashlib.sha256()
     with open(path, "rb") as f:
-        for block in iter(lambda: f.read(8192), b""):
+        if hasattr(hashlib, "file_digest"):
+            # Python 3.11+: read loop runs in C, straight into OpenSSL's SHA-256
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        h = hashlib.sha256()
+        for block in iter(lambda: f.read(1 << 20), b""):
             h.update(block)
-    return h.hexdigest()
+        return h.hexdigest()
+
+
+def _hash_files(files: list[Path]) -> dict[str, str]:
+    # Mostly I/O, and hashlib releases the GIL on large buffers — threads suffice
+    with ThreadPoolExecutor(max_workers=min(8, len(files) or 1)) as ex:
+        return dict(zip((f.name for f in files), ex.map(_file_hash, files)))
 
 
 def compute_file_hashes(docs_dir: Path) -> dict[str, str]:
-    hashes = {}
-    for f in sorted(docs_dir.iterdir()):
-        if f.suffix.lower() in config.SUPPORTED_EXTENSIONS:
-            hashes[f.name] = _file_hash(f)
-    return hashes
+    return _hash_files(_supported_files(docs_dir))
+
+
+def compute_file_fingerprints(docs_dir: Path) -> dict[str, tuple[int, int]]:
+    """(size, mtime_ns) per document — a stat() call instead of reading the file."""
+    fingerprints = {}
+    for f in _supported_files(docs_dir):
+        st = f.stat()
+        fingerprints[f.name] = (st.st_size, st.st_mtime_ns)
+    return fingerprints
+
+
+# ---------------------------------------------------------------------------
+# Index files – JSON (orjson when installed)
+# ---------------------------------------------------------------------------
+
+def _json_line(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj) + b"\n"
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def _json_pretty(obj) -> bytes:
+    # Human-readable (manifest.json is meant to be inspected by hand)
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def _parse_json(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# ---------------------------------------------------------------------------
+# Index files – write then rename
+# ---------------------------------------------------------------------------
+
+def _tmp_path(path: Path) -> Path:
+    """Per-process scratch file next to ``path``, keeping its suffix.
+
+    Same directory so the rename is atomic; same suffix so np.save/np.savez
+    don't append another one.
+    """
+    return path.with_name(f"{path.stem}.{os.getpid()}.tmp{path.suffix}")
+
+
+# ---------------------------------------------------------------------------
+# Embedding storage – dtype and normalization
+# ---------------------------------------------------------------------------
+
+def _embedding_dtype() -> type:
+    # float16 halves the file and the page cache it occupies, but NumPy has
+    # no fp16 BLAS: every query must convert the rows to float32 first
+    # (~10x slower than scoring float32 storage), hence off by default
+    return np.float16 if config.FP16_EMBEDDINGS else np.float32
+
+
+# Rows converted per block when scoring float16 storage
+_SCORE_BLOCK_ROWS = 8192
+
+
+def _cosine_scores(emb: np.ndarray, q_emb: np.ndarray) -> np.ndarray:
+    """``emb @ q_emb`` in float32 without a float32 copy of the whole matrix."""
+    if emb.dtype == np.float32:
+        return emb @ q_emb
+    # Converting block by block bounds the temporary to one block, instead
+    # of NumPy materializing the full matrix as float32 on every query
+    scores = np.empty(len(emb), dtype=np.float32)
+    for start in range(0, len(emb), _SCORE_BLOCK_ROWS):
+        block = emb[start:start + _SCORE_BLOCK_ROWS]
+        scores[start:start + len(block)] = block.astype(np.float32) @ q_emb
+    return scores
+
+
+def _normalize_rows(emb: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length so cosine similarity is a plain dot product."""
+    emb = np.asarray(emb, dtype=np.float32)
+    if emb.ndim != 2 or len(emb) == 0:
+        return emb
+    norms = np.linalg.norm(emb, axis=1, keepdims=True)
+    return emb / np.maximum(norms, 1e-12)
+
+
+def _is_normalized(emb: np.ndarray, sample: int = 16) -> bool:
+    # Indexes saved before normalization have no unit rows at all, so a few
+    # rows are enough to tell — and avoid reading a memory-mapped file in full
+    norms = np.linalg.norm(np.asarray(emb[:sample], dtype=np.float32), axis=1)
+    norms = norms[norms > 0]
+    return bool(np.allclose(norms, 1.0, atol=1e-2))
 
 
 # ---------------------------------------------------------------------------
@@ -201,18 +545,46 @@ class HybridIndex:
         self.embeddings: np.ndarray | None = None
         self.manifest: dict = {}           # {filename: {hash, chunk_start, chunk_end}}
         self.bm25 = BM25()
+        self.ann = None                    # faiss HNSW over embeddings, large indexes only
         self._embedder: SwedishEmbedder | None = None
+        # (size, mtime_ns) of touched-but-identical files, found by needs_reindex
+        self._refreshed_fingerprints: dict[str, tuple[int, int]] = {}
 
     def _get_embedder(self) -> SwedishEmbedder:
         if self._embedder is None:
-            self._embedder = SwedishEmbedder()
+            self._embedder = get_embedder()
         return self._embedder
 
+    def _embed_chunks(self, texts: list[str]) -> np.ndarray:
+        """Embed chunk texts as unit-length rows (cosine = dot product)."""
+        # embed() already returns unit-length rows
+        return self._get_embedder().embed(texts).astype(_embedding_dtype(), copy=False)
+
+    def _rebuild_ann(self):
+        """(Re)build the approximate index, or drop it for small/faiss-less setups."""
+        self.ann = None
+        if faiss is None or self.embeddings is None:
+            return
+        if len(self.embeddings) < config.ANN_MIN_CHUNKS:
+            return
+        emb = np.ascontiguousarray(self.embeddings, dtype=np.float32)
+        # Inner product on unit vectors = cosine similarity
+        self.ann = faiss.IndexHNSWFlat(emb.shape[1], config.ANN_HNSW_M,
+                                       faiss.METRIC_INNER_PRODUCT)
+        self.ann.hnsw.efSearch = config.ANN_EF_SEARCH
+        self.ann.add(emb)
+
     # --- Build / Reindex ---------------------------------------------------
 
     def build(self, docs_dir: Path):
-        docs = load_documents(docs_dir)
+        # stat() before hashing: a file edited in between is rehashed next time
+        fingerprints = compute_file_fingerprints(docs_dir)
         file_hashes = compute_file_hashes(docs_dir)
+        # Unchanged files skip parsing, even on a full rebuild
+        files = _supported_files(docs_dir)
+        docs = [{"filename": f.name, "text": text}
+                for f, text in zip(files, _load_many_cached(files, file_hashes))
+                if text.strip()]
 
         self.chunks = []
         self.manifest = {}
@@ -227,43 +599,76 @@ class HybridIndex:
                     "chunk_idx": i,
                 })
             end = len(self.chunks)
+            size, mtime_ns = fingerprints.get(doc["filename"], (0, 0))
             self.manifest[doc["filename"]] = {
                 "hash": file_hashes.get(doc["filename"], ""),
+                "size": size,
+                "mtime_ns": mtime_ns,
                 "chunk_start": start,
                 "chunk_end": end,
             }
 
         print(f"Skapade {len(self.chunks)} chunks från {len(docs)} dokument.")
 
-        embedder = self._get_embedder()
         texts = [c["text"] for c in self.chunks]
-        self.embeddings = embedder.embed(texts)
+        self.embeddings = self._embed_chunks(texts)
+        self._rebuild_ann()
 
         self.bm25.fit(texts)
         self.save()
         print("Index sparat.")
 
     def needs_reindex(self, docs_dir: Path) -> tuple[bool, list[str], list[str], list[str]]:
-        current = compute_file_hashes(docs_dir)
+        current = compute_file_fingerprints(docs_dir)
         old_files = set(self.manifest.keys())
         new_files = set(current.keys())
 
         added = sorted(new_files - old_files)
         removed = sorted(old_files - new_files)
-        changed = sorted(
-            f for f in old_files & new_files
-            if current[f] != self.manifest[f]["hash"]
-        )
+
+        # Only files whose size or mtime moved are hashed; the hash decides
+        suspects = [
+            f for f in sorted(old_files & new_files)
+            if (self.manifest[f].get("size"), self.manifest[f].get("mtime_ns")) != current[f]
+        ]
+        hashes = _hash_files([docs_dir / f for f in suspects])
+        changed = [f for f in suspects if hashes[f] != self.manifest[f]["hash"]]
+
+        # Touched but identical (or a manifest without fingerprints): keep the
+        # new stat aside. Read-only commands never write the manifest — only
+        # save_refreshed_fingerprints/reindex persist it.
+        self._refreshed_fingerprints = {
+            f: current[f] for f in suspects if f not in changed
+        }
 
         needs = bool(added or removed or changed)
         return needs, added, changed, removed
 
+    def save_refreshed_fingerprints(self):
+        """Store the fingerprints refreshed by the last needs_reindex, so the
+        next check skips hashing those files."""
+        if not self._apply_refreshed_fingerprints():
+            return
+        if (config.INDEX_DIR / "manifest.json").exists():
+            self._save_manifest()
+
+    def _apply_refreshed_fingerprints(self) -> bool:
+        refreshed, self._refreshed_fingerprints = self._refreshed_fingerprints, {}
+        for f, (size, mtime_ns) in refreshed.items():
+            if f in self.manifest:
+                self.manifest[f]["size"], self.manifest[f]["mtime_ns"] = size, mtime_ns
+        return bool(refreshed)
+
     def reindex(self, docs_dir: Path):
         needs, added, changed, removed = self.needs_reindex(docs_dir)
         if not needs:
+            self.save_refreshed_fingerprints()
             print("Index är redan uppdaterat.")
             return
 
+        # Saved together with the rest of the index below
+        self._apply_refreshed_fingerprints()
+
         if added:
             print(f"  Nya filer: {', '.join(added)}")
         if changed:
@@ -276,28 +681,41 @@ class HybridIndex:
 
         # Remove chunks for deleted/changed files
         if files_to_remove:
-            keep_indices = [
-                i for i, c in enumerate(self.chunks)
-                if c["filename"] not in files_to_remove
-            ]
-            self.chunks = [self.chunks[i] for i in keep_indices]
-            if self.embeddings is not None and keep_indices:
+            # Each file's chunks are one contiguous manifest range
+            keep_mask = np.ones(len(self.chunks), dtype=bool)
+            for fname in files_to_remove:
+                info = self.manifest.pop(fname, None)
+                if info:
+                    keep_mask[info["chunk_start"]:info["chunk_end"]] = False
+
+            keep_indices = np.flatnonzero(keep_mask)
+            self.chunks = [self.chunks[i] for i in keep_indices.tolist()]
+            if self.embeddings is not None and len(keep_indices):
                 self.embeddings = self.embeddings[keep_indices]
-            elif not keep_indices:
+            elif not len(keep_indices):
                 self.embeddings = None
 
-            for fname in files_to_remove:
-                self.manifest.pop(fname, None)
+            # Surviving ranges move down by the number of chunks removed
+            # before them — O(files) instead of rescanning every chunk
+            shift = np.concatenate(([0], np.cumsum(~keep_mask)))
+            for info in self.manifest.values():
+                info["chunk_start"] -= int(shift[info["chunk_start"]])
+                info["chunk_end"] -= int(shift[info["chunk_end"]])
+
+            self.bm25.remove_docs(keep_mask)
+
+            # HNSW can't delete vectors — rebuild from the surviving rows
+            self._rebuild_ann()
 
         # Add chunks for new/changed files
         if files_to_add:
-            file_hashes = compute_file_hashes(docs_dir)
-            embedder = self._get_embedder()
+            fingerprints = compute_file_fingerprints(docs_dir)
+            file_hashes = _hash_files([docs_dir / fname for fname in files_to_add])
             new_chunk_texts = []
 
-            for fname in sorted(files_to_add):
-                fpath = docs_dir / fname
-                text = load_document(fpath)
+            fnames = sorted(files_to_add)
+            texts = _load_many_cached([docs_dir / fname for fname in fnames], file_hashes)
+            for fname, text in zip(fnames, texts):
                 text_chunks = chunk_text(text)
                 start = len(self.chunks)
                 for i, c in enumerate(text_chunks):
@@ -308,29 +726,50 @@ class HybridIndex:
                     })
                     new_chunk_texts.append(c)
                 end = len(self.chunks)
+                size, mtime_ns = fingerprints[fname]
                 self.manifest[fname] = {
                     "hash": file_hashes[fname],
+                    "size": size,
+                    "mtime_ns": mtime_ns,
                     "chunk_start": start,
                     "chunk_end": end,
                 }
 
-            new_embeddings = embedder.embed(new_chunk_texts)
+            new_embeddings = self._embed_chunks(new_chunk_texts)
             if self.embeddings is not None and len(self.embeddings) > 0:
-                self.embeddings = np.vstack([self.embeddings, new_embeddings])
+                self.embeddings = np.vstack([self.embeddings, new_embeddings]).astype(
+                    _embedding_dtype(), copy=False)
             else:
                 self.embeddings = new_embeddings
 
-            print(f"  Genererade {len(new_chunk_texts)} nya chunks.")
+            if self.ann is not None:
+                self.ann.add(np.ascontiguousarray(new_embeddings, dtype=np.float32))
+            else:
+                # May have crossed ANN_MIN_CHUNKS
+                self._rebuild_ann()
 
-        # Rebuild BM25 (fast)
-        self.bm25.fit([c["text"] for c in self.chunks])
+            # Only the new chunks are tokenized
+            self.bm25.add_docs(new_chunk_texts)
 
-        # Update chunk_start/chunk_end in manifest
-        self._rebuild_manifest_ranges()
+            print(f"  Genererade {len(new_chunk_texts)} nya chunks.")
 
         self.save()
         print(f"Index uppdaterat: {len(self.chunks)} chunks totalt.")
 
+    def _manifest_ranges_valid(self) -> bool:
+        # Ranges must tile the chunk list, each bounded by its own file's chunks
+        n = len(self.chunks)
+        total = 0
+        for fname, info in self.manifest.items():
+            start, end = info.get("chunk_start", -1), info.get("chunk_end", -1)
+            if not 0 <= start <= end <= n:
+                return False
+            if start < end and (self.chunks[start]["filename"] != fname
+                                or self.chunks[end - 1]["filename"] != fname):
+                return False
+            total += end - start
+        return total == n
+
     def _rebuild_manifest_ranges(self):
         ranges: dict[str, list[int]] = {}
         for i, c in enumerate(self.chunks):
@@ -351,13 +790,16 @@ class HybridIndex:
             return []
 
         # Semantic search
-        embedder = self._get_embedder()
-        q_emb = embedder.embed([query])[0]
-        norms = np.linalg.norm(self.embeddings, axis=1) * np.linalg.norm(q_emb)
-        norms = np.where(norms == 0, 1, norms)
-        cosine_scores = self.embeddings @ q_emb / norms
-        sem_ranked = sorted(enumerate(cosine_scores.tolist()),
-                            key=lambda x: -x[1])[:top_k * 2]
+        q_emb = self._get_embedder().embed_query(query)
+        if self.ann is not None:
+            # Approximate: HNSW graph walk instead of scoring every row
+            scores, ids = self.ann.search(q_emb[None, :], top_k * 2)
+            sem_ranked = [(i, s) for i, s in zip(ids[0].tolist(), scores[0].tolist())
+                          if i >= 0]
+        else:
+            # Stored rows are unit length: one pass over the matrix, no norms
+            cosine_scores = _cosine_scores(self.embeddings, q_emb)
+            sem_ranked = _top_k(cosine_scores, top_k * 2)
 
         # BM25 search
         bm25_ranked = self.bm25.search(query, top_k=top_k * 2)
@@ -378,40 +820,120 @@ class HybridIndex:
 
     # --- Persistence -------------------------------------------------------
 
+    def _save_manifest(self):
+        config.INDEX_DIR.mkdir(exist_ok=True)
+        path = config.INDEX_DIR / "manifest.json"
+        tmp = _tmp_path(path)
+        tmp.write_bytes(_json_pretty(self.manifest))
+        tmp.replace(path)
+
     def save(self):
+        # Every file is written next to its target and renamed over it only
+        # once all are complete. Readers — other processes memory-mapping
+        # embeddings.npy included — keep the old inodes instead of seeing a
+        # truncated file, and load() never reads a half-written one.
         config.INDEX_DIR.mkdir(exist_ok=True)
+        staged = {}
 
-        with open(config.INDEX_DIR / "manifest.json", "w", encoding="utf-8") as f:
-            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        path = config.INDEX_DIR / "manifest.json"
+        staged[path] = _tmp_path(path)
+        staged[path].write_bytes(_json_pretty(self.manifest))
 
-        with open(config.INDEX_DIR / "chunks.json", "w", encoding="utf-8") as f:
-            json.dump(self.chunks, f, ensure_ascii=False, indent=2)
+        # One chunk per line, written as we go — never the whole list as one string
+        path = config.INDEX_DIR / "chunks.jsonl"
+        staged[path] = _tmp_path(path)
+        with open(staged[path], "wb") as f:
+            for c in self.chunks:
+                f.write(_json_line(c))
 
         if self.embeddings is not None:
-            np.save(config.INDEX_DIR / "embeddings.npy", self.embeddings)
+            # Writing a new file, so a memory-mapped source needs no copy
+            path = config.INDEX_DIR / "embeddings.npy"
+            staged[path] = _tmp_path(path)
+            np.save(staged[path], self.embeddings.astype(_embedding_dtype(), copy=False))
+
+        ann_path = config.INDEX_DIR / "ann.faiss"
+        if self.ann is not None:
+            staged[ann_path] = _tmp_path(ann_path)
+            faiss.write_index(self.ann, str(staged[ann_path]))
+
+        path = config.INDEX_DIR / "bm25.npz"
+        staged[path] = _tmp_path(path)
+        self.bm25.save(staged[path])
+
+        for path, tmp in staged.items():
+            tmp.replace(path)
+
+        if self.ann is None:
+            ann_path.unlink(missing_ok=True)
+        (config.INDEX_DIR / "chunks.json").unlink(missing_ok=True)
 
     @classmethod
     def load(cls) -> "HybridIndex":
         idx = cls()
 
         manifest_path = config.INDEX_DIR / "manifest.json"
-        chunks_path = config.INDEX_DIR / "chunks.json"
+        chunks_path = config.INDEX_DIR / "chunks.jsonl"
         emb_path = config.INDEX_DIR / "embeddings.npy"
 
         if not manifest_path.exists():
             return idx
 
-        with open(manifest_path, "r", encoding="utf-8") as f:
-            idx.manifest = json.load(f)
-
-        with open(chunks_path, "r", encoding="utf-8") as f:
-            idx.chunks = json.load(f)
-
-        if emb_path.exists():
-            idx.embeddings = np.load(emb_path)
-
-        # Rebuild BM25 from chunk texts
-        if idx.chunks:
+        with open(manifest_path, "rb") as f:
+            idx.manifest = _parse_json(f.read())
+
+        if chunks_path.exists():
+            with open(chunks_path, "rb") as f:
+                idx.chunks = [_parse_json(line) for line in f if line.strip()]
+        else:
+            # Index written before chunks.jsonl
+            with open(config.INDEX_DIR / "chunks.json", "rb") as f:
+                idx.chunks = _parse_json(f.read())
+
+        # reindex trusts the manifest ranges; repair them if they drifted
+        if not idx._manifest_ranges_valid():
+            idx._rebuild_manifest_ranges()
+
+        if emb_path.exists() and idx.chunks:
+            # Read-only memory map: pages are loaded on demand and shared
+            # through the OS page cache between processes using the index
+            # (float32 storage only — float16 is converted per query, see
+            # _cosine_scores, so each query also needs private memory)
+            idx.embeddings = np.load(emb_path, mmap_mode="r")
+            if not _is_normalized(idx.embeddings):
+                # Index from before embeddings were stored normalized
+                idx.embeddings = _normalize_rows(idx.embeddings).astype(
+                    _embedding_dtype(), copy=False)
+            elif idx.embeddings.dtype != _embedding_dtype():
+                # Stored with the other FP16_EMBEDDINGS setting: convert once
+                # here rather than per query; the next save rewrites the file
+                idx.embeddings = np.asarray(idx.embeddings, dtype=_embedding_dtype())
+
+            ann_path = config.INDEX_DIR / "ann.faiss"
+            if faiss is not None and ann_path.exists():
+                idx.ann = faiss.read_index(str(ann_path))
+                idx.ann.hnsw.efSearch = config.ANN_EF_SEARCH
+            if idx.ann is None or idx.ann.ntotal != len(idx.embeddings):
+                idx._rebuild_ann()
+                # Persist the rebuilt graph so the next load reads it
+                # instead of paying for the HNSW build again. Workers may
+                # load concurrently: write a per-process temp file and
+                # rename, so none of them reads a partial ann.faiss
+                if idx.ann is not None:
+                    tmp = _tmp_path(ann_path)
+                    faiss.write_index(idx.ann, str(tmp))
+                    tmp.replace(ann_path)
+                elif faiss is not None:
+                    ann_path.unlink(missing_ok=True)
+
+        # Reuse the saved BM25 postings; re-tokenize only for indexes that
+        # predate bm25.npz or don't match the chunk list
+        bm25_path = config.INDEX_DIR / "bm25.npz"
+        if idx.chunks and bm25_path.exists():
+            bm25 = BM25.load(bm25_path)
+            if bm25._n_docs == len(idx.chunks):
+                idx.bm25 = bm25
+        if idx.chunks and idx.bm25._n_docs != len(idx.chunks):
             idx.bm25.fit([c["text"] for c in idx.chunks])
 
         return idx
@@ -2,11 +2,15 @@
 """CLI för semantisk dokumentsökning i ramavtal."""
 
 import argparse
+import io
 import sys
 import textwrap
 
 import config
-from rag_engine import HybridIndex
+from rag_engine import HybridIndex, clean_text_cache, compute_file_hashes
+
+# One wrapper for all results (textwrap.fill builds a new one per call)
+_WRAPPER = textwrap.TextWrapper(width=100)
 
 
 def cmd_index(args):
@@ -15,6 +19,11 @@ def cmd_index(args):
         print(f"Fel: Mappen '{config.DOCS_DIR}' finns inte.")
         sys.exit(1)
 
+    if args.clean_cache:
+        current = set(compute_file_hashes(config.DOCS_DIR).values())
+        removed = clean_text_cache(current)
+        print(f"Textcache: tog bort {removed} inaktuella filer.")
+
     index = HybridIndex.load()
 
     if index.chunks:
@@ -23,6 +32,7 @@ def cmd_index(args):
             print("Inkrementell omindexering...")
             index.reindex(config.DOCS_DIR)
         else:
+            index.save_refreshed_fingerprints()
             print("Index är redan uppdaterat. Använd --force för att bygga om helt.")
             if not args.force:
                 return
@@ -86,16 +96,19 @@ def cmd_search(args):
         print("Inga resultat hittades.")
         return
 
+    # Build the whole listing first and write it to stdout once
+    out = io.StringIO()
     for i, r in enumerate(results, 1):
-        print(f"--- Resultat {i} (score: {r['score']}) ---")
-        print(f"Källa: {r['filename']} (chunk {r['chunk_idx']})")
-        print(textwrap.fill(r["text"][:500], width=100))
-        print()
+        out.write(f"--- Resultat {i} (score: {r['score']}) ---\n")
+        out.write(f"Källa: {r['filename']} (chunk {r['chunk_idx']})\n")
+        out.write(_WRAPPER.fill(r["text"][:500]))
+        out.write("\n\n")
+    sys.stdout.write(out.getvalue())
 
 
 def cmd_kategori(args):
     """Kategoribaserad sökning med Claude-klassificering."""
-    from category_classifier import search_by_category
+    from category_classifier import search_by_categories, search_by_category
 
     index = HybridIndex.load()
 
@@ -105,22 +118,40 @@ def cmd_kategori(args):
 
     _check_stale(index)
 
+    if args.batch:
+        # Each argument is its own category, classified in one Messages Batch
+        print(f"Kategori-sökning (batch): {', '.join(args.category)}\n")
+        results, failed = search_by_categories(args.category, index)
+        for category, relevant in results.items():
+            print(f"\n=== {category} ===")
+            if category in failed:
+                print(f"Klassificering misslyckades: {failed[category]}")
+            _print_classified(relevant)
+        if failed:
+            sys.exit(1)
+        return
+
     category = " ".join(args.category)
     print(f"Kategori-sökning: \"{category}\"\n")
 
     results = search_by_category(category, index)
+    _print_classified(results)
+
 
+def _print_classified(results: list[dict]):
     if not results:
         print("Inga relevanta passager hittades för denna kategori.")
         return
 
     print(f"\n{len(results)} relevanta passager:\n")
-    for i, r in enumerate(results, 1):
-        print(f"--- [{r['relevance']}/10] {r['filename']} (chunk {r['chunk_idx']}) ---")
+    out = io.StringIO()
+    for r in results:
+        out.write(f"--- [{r['relevance']}/10] {r['filename']} (chunk {r['chunk_idx']}) ---\n")
         if r.get("motivering"):
-            print(f"Motivering: {r['motivering']}")
-        print(textwrap.fill(r["text"][:500], width=100))
-        print()
+            out.write(f"Motivering: {r['motivering']}\n")
+        out.write(_WRAPPER.fill(r["text"][:500]))
+        out.write("\n\n")
+    sys.stdout.write(out.getvalue())
 
 
 def _check_stale(index: HybridIndex):
@@ -142,6 +173,8 @@ def main():
     p_index = sub.add_parser("index", help="Indexera/omindexera dokument")
     p_index.add_argument("--force", action="store_true",
                          help="Bygg om hela indexet från grunden")
+    p_index.add_argument("--clean-cache", action="store_true",
+                         help="Rensa cachad dokumenttext för filer som ändrats eller tagits bort")
 
     # status
     sub.add_parser("status", help="Visa indexstatus")
@@ -155,6 +188,9 @@ def main():
     # kategori
     p_cat = sub.add_parser("kategori", help="Kategoribaserad sökning (Claude)")
     p_cat.add_argument("category", nargs="+", help="Kategorinamn")
+    p_cat.add_argument("--batch", action="store_true",
+                       help="Varje argument är en egen kategori; klassificera alla "
+                            "i ett Messages Batch-jobb (halva priset, längre latens)")
 
     args = parser.parse_args()
 